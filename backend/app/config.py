@@ -3,7 +3,13 @@ Application configuration
 """
 
 import os
-from typing import List
+from functools import lru_cache
+from typing import Tuple
+
+@lru_cache(maxsize=None)
+def _split_csv(value: str) -> Tuple[str, ...]:
+    """Parse a comma-separated environment value into a tuple of stripped items"""
+    return tuple(item.strip() for item in value.split(","))
 
 class Settings:
     """Application settings"""
@@ -12,18 +18,18 @@ class Settings:
         self.DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
         self.HOST: str = os.getenv("HOST", "0.0.0.0")
         self.PORT: int = int(os.getenv("PORT", "8000"))
+        self.WORKERS: int = int(os.getenv("WORKERS", "1"))
         
         # Security settings - parse comma-separated values
-        allowed_hosts_str = os.getenv("ALLOWED_HOSTS", "localhost,127.0.0.1")
-        self.ALLOWED_HOSTS: List[str] = [host.strip() for host in allowed_hosts_str.split(",")]
-        
-        cors_origins_str = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:8000")  
-        self.CORS_ORIGINS: List[str] = [origin.strip() for origin in cors_origins_str.split(",")]
+        self.ALLOWED_HOSTS: Tuple[str, ...] = _split_csv(os.getenv("ALLOWED_HOSTS", "localhost,127.0.0.1"))
+        self.CORS_ORIGINS: Tuple[str, ...] = _split_csv(os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:8000"))
         
         # Screenshot settings
         self.MAX_CONCURRENT_SCREENSHOTS: int = int(os.getenv("MAX_CONCURRENT_SCREENSHOTS", "3"))
+        self.MAX_BULK_URLS: int = int(os.getenv("MAX_BULK_URLS", "50"))
         self.SCREENSHOT_TIMEOUT: int = int(os.getenv("SCREENSHOT_TIMEOUT", "30"))
         self.CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))
+        self.STARTUP_TIMEOUT: int = int(os.getenv("STARTUP_TIMEOUT", "30"))
         
         # Storage settings
         self.TEMP_DIR: str = os.getenv("TEMP_DIR", "/tmp/screenshots")
@@ -32,4 +38,9 @@ class Settings:
         # Rate limiting
         self.RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the shared settings instance, parsing the environment only once"""
+    return Settings()
+
+settings = get_settings()
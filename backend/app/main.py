@@ -1,24 +1,63 @@
 # Add this to your backend/app/main.py or create it
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.requests import Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from contextlib import asynccontextmanager
+from cachetools import TTLCache
+import asyncio
+import os
+import time
 
-from .models import BulkScreenshotRequest, ScreenshotResult
-from .screenshot_service import ScreenshotService
+from .config import get_settings
+from .models import BulkScreenshotRequest, ScreenshotResult, DEFAULT_SCREENSHOT_OPTIONS
+from .screenshot_service import ScreenshotError, ScreenshotService
+from .utils import remove_stale_files
+
+settings = get_settings()
 
 # Global screenshot service instance
 screenshot_service = ScreenshotService()
 
+# Recent successful URL-mode screenshots keyed by (url, options). Inline results
+# carry the whole base64 image, so they aren't kept
+result_cache = TTLCache(maxsize=1024, ttl=settings.CACHE_TTL)
+
+# Latest health check, shared by concurrent probes and reused briefly so
+# frequent probes don't each open a browser page
+HEALTH_CHECK_TTL = 2.0
+_health = {"checked_at": 0.0, "check": None}
+
+# How often stored screenshots past the cache TTL are deleted from TEMP_DIR
+TEMP_SWEEP_INTERVAL = 300
+
+async def _sweep_screenshots():
+    """Periodically delete stored screenshots that outlived the result cache"""
+    while True:
+        removed = await asyncio.to_thread(remove_stale_files, settings.TEMP_DIR, settings.CACHE_TTL)
+        if removed:
+            print(f"Removed {removed} expired screenshots")
+        await asyncio.sleep(TEMP_SWEEP_INTERVAL)
+
+async def _initialize_service(ready: asyncio.Event):
+    """Launch the browser in the background and flag the app as ready"""
+    if await screenshot_service.initialize():
+        ready.set()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    await screenshot_service.initialize()
+    # Startup - launch the browser without holding up the server
+    app.state.ready = asyncio.Event()
+    init_task = app.state.init_task = asyncio.create_task(_initialize_service(app.state.ready))
+    sweep_task = asyncio.create_task(_sweep_screenshots())
+    # Compile the page template now rather than on the first request
+    templates.get_template("index.html")
     yield
     # Shutdown
+    init_task.cancel()
+    sweep_task.cancel()
     await screenshot_service.cleanup()
 
 # Create FastAPI app
@@ -26,44 +65,95 @@ app = FastAPI(
     title="Twitter Screenshot API",
     description="Capture beautiful screenshots of tweets",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+    # Only expose the OpenAPI schema and docs in debug mode so production
+    # never pays for building the schema
+    openapi_url="/openapi.json" if settings.DEBUG else None
 )
 
 # Mount static files and templates
-app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
-templates = Jinja2Templates(directory="frontend/templates")
+app.mount("/static", StaticFiles(directory="frontend/static", check_dir=False, html=False), name="static")
+os.makedirs(settings.TEMP_DIR, exist_ok=True)
+app.mount("/screenshots", StaticFiles(directory=settings.TEMP_DIR, check_dir=False), name="screenshots")
+# Templates only change between deploys, so skip mtime checks outside debug
+templates = Jinja2Templates(directory="frontend/templates", auto_reload=settings.DEBUG)
+
+@app.middleware("http")
+async def wait_for_readiness(request: Request, call_next):
+    """Hold API requests until the screenshot service has started"""
+    path = request.url.path
+    if path.startswith("/api/") and path != "/api/health" and not request.app.state.ready.is_set():
+        init_task = request.app.state.init_task
+        # Only wait while startup is still running; a failed startup is reported right away
+        if not init_task.done():
+            await asyncio.wait({init_task}, timeout=settings.STARTUP_TIMEOUT)
+        if not request.app.state.ready.is_set():
+            detail = "Screenshot service failed to start" if init_task.done() else "Screenshot service is not ready"
+            return ORJSONResponse(status_code=503, content={"detail": detail})
+    return await call_next(request)
+
+@app.exception_handler(ScreenshotError)
+async def screenshot_error_handler(request: Request, exc: ScreenshotError):
+    return ORJSONResponse(status_code=502, content={"detail": str(exc)})
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 @app.get("/api/health")
-async def health_check():
+async def health_check(request: Request):
     """Health check endpoint"""
-    is_healthy = await screenshot_service.health_check()
+    now = time.monotonic()
+    if _health["check"] is None or now - _health["checked_at"] > HEALTH_CHECK_TTL:
+        # Start the check before awaiting it, so probes arriving meanwhile wait on this one
+        _health.update(checked_at=now, check=asyncio.create_task(screenshot_service.health_check()))
+    healthy = await asyncio.shield(_health["check"])
     return {
-        "status": "healthy" if is_healthy else "unhealthy",
+        "status": "healthy" if healthy else "unhealthy",
+        "ready": request.app.state.ready.is_set(),
         "service": "twitter-screenshot-api"
     }
 
 @app.post("/api/screenshot/bulk")
 async def capture_screenshots_bulk(request: BulkScreenshotRequest):
     """Capture screenshots for multiple URLs"""
-    try:
-        if not request.urls:
-            raise HTTPException(status_code=400, detail="No URLs provided")
+    # Use the shared defaults if no options provided
+    options = request.options or DEFAULT_SCREENSHOT_OPTIONS
 
-        # Use default options if none provided
-        options = request.options or ScreenshotOptions()
+    # Serve cached screenshots first, then capture each remaining distinct URL once
+    unique_urls = list(dict.fromkeys(request.urls))
+    cacheable = options.return_mode == "url"
+    by_url = {}
+    if cacheable:
+        for url in unique_urls:
+            cached = result_cache.get((url, options))
+            if cached is not None:
+                by_url[url] = cached
+    misses = [url for url in unique_urls if url not in by_url]
 
-        # Capture screenshots
-        results = await screenshot_service.capture_tweets(request.urls, options)
+    if misses:
+        captured = await screenshot_service.capture_tweets(misses, options)
+        for url, result in zip(misses, captured):
+            by_url[url] = result
+            if cacheable and result.success:
+                result_cache[(url, options)] = result
 
-        return {"results": results}
+    # Fan results back out in request order
+    results = [by_url[url] for url in request.urls]
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # orjson serializes the result dataclasses natively, so skip
+    # jsonable_encoder and build the response directly
+    return ORJSONResponse({"results": results})
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(
+        "app.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        loop="auto",
+        http="auto",
+        workers=settings.WORKERS,
+        log_level="warning"
+    )
\ No newline at end of file
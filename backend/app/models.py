@@ -1,25 +1,48 @@
 # In your backend/app/models.py - CREATE THIS FILE
 
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from dataclasses import dataclass
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Annotated, List, Literal, Optional, Dict, Any
+
+from .config import get_settings
+from .utils import TWEET_URL_RE, is_embed_html
+
+settings = get_settings()
 
 class ScreenshotOptions(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     width: int = 600
-    format: str = "png"  # png or jpg
+    format: Literal["png", "jpg", "webp"] = "png"
     theme: str = "light"  # light or dark
     background: str = "white"
     border_radius: int = 12
     include_metadata: bool = True
+    return_mode: Literal["inline", "url"] = "url"  # base64 in the response or a link to a stored file
 
 class BulkScreenshotRequest(BaseModel):
-    urls: List[str]
+    urls: Annotated[List[str], Field(min_length=1, max_length=settings.MAX_BULK_URLS)]
     options: Optional[ScreenshotOptions] = None
 
-class ScreenshotResult(BaseModel):
+    @field_validator("urls")
+    @classmethod
+    def check_urls(cls, urls: List[str]) -> List[str]:
+        """Reject anything that is neither a tweet URL nor embed HTML"""
+        for url in urls:
+            if not (TWEET_URL_RE.match(url) or is_embed_html(url)):
+                raise ValueError(f"Not a tweet URL or embed HTML: {url[:100]}")
+        return urls
+
+@dataclass
+class ScreenshotResult:
     url: str
     success: bool
     image_base64: Optional[str] = None
+    image_url: Optional[str] = None
     filename: Optional[str] = None
     file_size: Optional[int] = None
     dimensions: Optional[Dict[str, int]] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+
+# Shared defaults for requests that omit options; safe to reuse since the model is frozen
+DEFAULT_SCREENSHOT_OPTIONS = ScreenshotOptions()
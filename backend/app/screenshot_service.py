@@ -5,20 +5,192 @@ Handles both direct tweet URLs and Twitter embed HTML
 
 import asyncio
 import base64
+import hashlib
 import io
+import multiprocessing
+import os
 import re
 import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Union
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Union
 from urllib.parse import urlparse, parse_qs
 
 from playwright.async_api import async_playwright, Page, Browser
 from PIL import Image, ImageDraw
+import numpy as np
+from cachetools import TTLCache
 import aiofiles
+import httpx
 
 from .models import ScreenshotOptions, ScreenshotResult
-from .config import settings
-from .utils import extract_tweet_id, generate_filename, clean_tweet_content
+from .config import get_settings
+from .utils import extract_tweet_id, generate_filename, clean_tweet_content, is_embed_html
+
+settings = get_settings()
+
+# True once widgets.js has rendered the tweet iframe. oEmbed markup already
+# contains the tweet text, so the text check only applies to the manual
+# template, whose placeholder paragraph reads "Loading tweet..."
+TWEET_READY_JS = """
+(checkPlaceholder) => {
+    if (document.querySelector('iframe[id^="twitter-widget"]')) return true;
+    if (!checkPlaceholder) return false;
+    const text = document.querySelector('.twitter-tweet p');
+    return !!text && !text.textContent.startsWith('Loading');
+}
+"""
+
+# Tracker hosts that never contribute to a tweet screenshot. They are blocked
+# at DNS resolution rather than with request routing, because Playwright turns
+# off the HTTP cache for routed contexts and widgets.js would be refetched on
+# every capture
+BLOCKED_DOMAINS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'ads-twitter.com',
+    'analytics.twitter.com'
+)
+HOST_RESOLVER_RULES = ', '.join(
+    f'MAP {pattern} ~NOTFOUND'
+    for domain in BLOCKED_DOMAINS
+    for pattern in (domain, f'*.{domain}')
+)
+
+USERNAME_RE = re.compile(r'(?:twitter|x)\.com/([^/]+)/')
+TWEET_ID_HTML_RES = (
+    re.compile(r'data-tweet-id="([^"]+)"'),
+    re.compile(r'/status/(\d+)'),
+    re.compile(r'twitter\.com/[^/]+/status/(\d+)'),
+    re.compile(r'x\.com/[^/]+/status/(\d+)')
+)
+
+# Age-gate and login-wall indicators, checked together in one round trip
+RESTRICTIONS_JS = """
+() => {
+    const texts = Array.from(document.querySelectorAll('button, a, span'), el => (el.textContent || '').trim());
+    const bodyText = document.body ? document.body.innerText : '';
+    return {
+        age: !!document.querySelector('[data-testid="confirmationSheetConfirm"]')
+            || texts.some(text => text.includes('Yes, view profile'))
+            || bodyText.includes('This account may include potentially sensitive content'),
+        login: !!document.querySelector('a[href="/login"]')
+            || texts.includes('Log in')
+    };
+}
+"""
+
+# First selector in priority order that matches something, or null to keep waiting
+FIRST_SELECTOR_JS = """
+(selectors) => selectors.find(selector => document.querySelector(selector)) || null
+"""
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# PIL encoder and save options for each output format. WebP uses the fastest
+# encoder method, and PNG skips optimize=True, which re-runs compression for little gain
+IMAGE_SAVE_OPTIONS = {
+    'png': ('PNG', {}),
+    'jpg': ('JPEG', {'quality': 90}),
+    'webp': ('WEBP', {'quality': 85, 'method': 0})
+}
+
+def _screenshot_type(image_format: str) -> str:
+    """Playwright only emits PNG or JPEG; other formats are encoded from PNG afterwards"""
+    return 'jpeg' if image_format == 'jpg' else 'png'
+
+def _process_image_sync(image_bytes: bytes, width: int, border_radius: int, background: str, image_format: str, as_base64: bool) -> Tuple[Union[bytes, str], int, int, int]:
+    """Post-process a screenshot in the image process pool, returning (image, file_size, width, height)
+
+    With as_base64 the image comes back as base64 text, so the event loop
+    only ever receives the final string rather than bytes it must encode
+    """
+    image_data, image_width, image_height = _render_image(image_bytes, width, border_radius, background, image_format)
+    if as_base64:
+        return base64.b64encode(image_data).decode('ascii'), len(image_data), image_width, image_height
+    return image_data, len(image_data), image_width, image_height
+
+def _unchanged_size(image_bytes: bytes, width: int, border_radius: int, background: str, image_format: str) -> Optional[Tuple[int, int]]:
+    """Return the screenshot's size if it already matches the requested output, else None
+
+    Image.open only reads the header, so this is cheap enough to run on the event loop
+    """
+    original = Image.open(io.BytesIO(image_bytes))
+    needs_radius = 0 < border_radius < min(original.width, original.height) // 2
+    needs_background = background != 'transparent' and original.mode == 'RGBA'
+    if original.width == width and original.format == IMAGE_SAVE_OPTIONS[image_format][0] and not needs_radius and not needs_background:
+        return original.width, original.height
+    return None
+
+def _render_image(image_bytes: bytes, width: int, border_radius: int, background: str, image_format: str) -> Tuple[bytes, int, int]:
+    """Apply the requested size, background and corners, then encode"""
+    target_format, save_options = IMAGE_SAVE_OPTIONS[image_format]
+
+    image = _process_image_full(image_bytes, width, border_radius, background)
+
+    # JPEG has no alpha channel, so rounded corners are flattened onto the background
+    if target_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGBA')
+        flattened = Image.new('RGB', image.size, background if background != 'transparent' else 'white')
+        flattened.paste(image, mask=image.split()[-1])
+        image = flattened
+
+    buffered = io.BytesIO()
+    image.save(buffered, format=target_format, **save_options)
+    return buffered.getvalue(), image.width, image.height
+
+def _process_image_full(image_bytes: bytes, width: int, border_radius: int, background: str) -> Image.Image:
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+
+        if image.width != width:
+            aspect_ratio = image.height / image.width
+            new_height = int(width * aspect_ratio)
+            image = image.resize((width, new_height), Image.Resampling.LANCZOS)
+
+        if background != 'transparent' and image.mode == 'RGBA':
+            bg_image = Image.new('RGB', image.size, background)
+            bg_image.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
+            image = bg_image
+
+        if border_radius > 0 and border_radius < min(image.width, image.height) // 2:
+            image = _apply_border_radius(image, border_radius)
+
+        return image
+    except Exception:
+        return Image.open(io.BytesIO(image_bytes))
+
+@lru_cache(maxsize=32)
+def _corner_mask(radius: int) -> np.ndarray:
+    """Top-left rounded-corner alpha quadrant, drawn once per radius and mirrored onto each corner"""
+    circle = Image.new('L', (radius * 2, radius * 2), 0)
+    ImageDraw.Draw(circle).ellipse([(0, 0), (radius * 2 - 1, radius * 2 - 1)], fill=255)
+    corner = np.array(circle)[:radius, :radius]
+    corner.flags.writeable = False
+    return corner
+
+def _apply_border_radius(image: Image.Image, radius: int) -> Image.Image:
+    try:
+        pixels = np.array(image if image.mode == 'RGBA' else image.convert('RGBA'))
+        alpha = pixels[..., 3]
+        radius = min(radius, image.width // 2, image.height // 2)
+        if radius > 0:
+            corner = _corner_mask(radius)
+            for rows, cols, mask in (
+                (slice(None, radius), slice(None, radius), corner),
+                (slice(None, radius), slice(-radius, None), corner[:, ::-1]),
+                (slice(-radius, None), slice(None, radius), corner[::-1, :]),
+                (slice(-radius, None), slice(-radius, None), corner[::-1, ::-1]),
+            ):
+                np.minimum(alpha[rows, cols], mask, out=alpha[rows, cols])
+        return Image.fromarray(pixels, 'RGBA')
+    except Exception:
+        return image
+
+class ScreenshotError(Exception):
+    """Raised when a screenshot cannot be captured"""
 
 class ScreenshotService:
     """Enhanced service with Twitter Embed API and direct tweet support"""
@@ -27,13 +199,30 @@ class ScreenshotService:
         self.playwright = None
         self.browser = None
         self.context = None
-        self.page_pool = []
-        self.max_concurrent_pages = 3
+        self.http = None
+        self.image_pool = None
+        self.page_pool: Optional[asyncio.Queue] = None
+        self.max_concurrent_pages = settings.MAX_CONCURRENT_SCREENSHOTS
+        self.max_concurrent_oembeds = 20
+        self.context_recycle_interval = 200
+        self.captures_since_recycle = 0
+        self.recycle_lock = None
+        self.recycle_task: Optional[asyncio.Task] = None
+        # Cleared during a recycle so new captures stop taking pages while the pool drains
+        self.pages_open: Optional[asyncio.Event] = None
+        # oEmbed HTML by tweet ID, so repeat URLs skip the network fetch
+        self.oembed_cache = TTLCache(maxsize=1024, ttl=300)
 
     async def initialize(self):
         """Initialize Playwright and browser"""
         try:
             self.playwright = await async_playwright().start()
+            self.http = httpx.AsyncClient(http2=True, timeout=8.0, headers={'user-agent': USER_AGENT})
+            # Image work is CPU-bound, so keep it off the event loop and out from under the GIL
+            self.image_pool = ProcessPoolExecutor(
+                max_workers=max(1, (os.cpu_count() or 1) // settings.WORKERS),
+                mp_context=multiprocessing.get_context('spawn')
+            )
 
             self.browser = await self.playwright.chromium.launch(
                 headless=True,
@@ -54,20 +243,19 @@ class ScreenshotService:
                     '--no-default-browser-check',
                     '--disable-site-isolation-trials',
                     '--disable-permissions-api',
+                    f'--host-resolver-rules={HOST_RESOLVER_RULES}',
                 ]
             )
 
-            self.context = await self.browser.new_context(
-                viewport={'width': 1400, 'height': 2000},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                java_script_enabled=True,
-                accept_downloads=False,
-                has_touch=False,
-                is_mobile=False,
-                locale='en-US',
-                timezone_id='UTC',
-                bypass_csp=True
-            )
+            self.context = await self._new_context()
+            self.recycle_lock = asyncio.Lock()
+            self.pages_open = asyncio.Event()
+            self.pages_open.set()
+
+            # Warm pages shared by every batch; the pool size also caps concurrent captures
+            self.page_pool = asyncio.Queue(maxsize=self.max_concurrent_pages)
+            for _ in range(self.max_concurrent_pages):
+                self.page_pool.put_nowait(await self._new_page())
 
             print("Screenshot service initialized with EMBED API support")
             return True
@@ -79,12 +267,18 @@ class ScreenshotService:
     async def cleanup(self):
         """Clean up browser resources"""
         try:
+            if self.recycle_task:
+                self.recycle_task.cancel()
             if self.context:
                 await self.context.close()
             if self.browser:
                 await self.browser.close()
             if self.playwright:
                 await self.playwright.stop()
+            if self.http:
+                await self.http.aclose()
+            if self.image_pool:
+                self.image_pool.shutdown(wait=False, cancel_futures=True)
             print("Screenshot service cleaned up successfully")
         except Exception as e:
             print(f"Error during cleanup: {e}")
@@ -103,20 +297,118 @@ class ScreenshotService:
         except Exception:
             return False
 
+    async def _new_context(self):
+        """Create a browser context with the capture settings"""
+        context = await self.browser.new_context(
+            viewport={'width': 1400, 'height': 2000},
+            user_agent=USER_AGENT,
+            java_script_enabled=True,
+            accept_downloads=False,
+            has_touch=False,
+            is_mobile=False,
+            locale='en-US',
+            timezone_id='UTC',
+            bypass_csp=True
+        )
+        return context
+
+    def _schedule_recycle(self):
+        """Start a context recycle in the background unless one is already running"""
+        if self.recycle_task is None or self.recycle_task.done():
+            self.recycle_task = asyncio.create_task(self._recycle_context())
+
+    async def _recycle_context(self):
+        """Replace the browser context to release memory it has accumulated"""
+        async with self.recycle_lock:
+            # Another batch may have recycled while we waited for the lock
+            if self.captures_since_recycle < self.context_recycle_interval:
+                return
+
+            drained = []
+            fresh = []
+            new_context = None
+            swapped = False
+            # Hold back new captures first, so the drain isn't stuck behind them
+            # while it sits on the pages it has already taken
+            self.pages_open.clear()
+            try:
+                # Taking every page from the pool waits for in-flight captures to finish
+                for _ in range(self.max_concurrent_pages):
+                    drained.append(await self.page_pool.get())
+                new_context = await self._new_context()
+                for _ in range(self.max_concurrent_pages):
+                    fresh.append(await self._new_page(new_context))
+                swapped = True
+            except Exception as e:
+                print(f"Browser context recycle failed: {e}")
+            finally:
+                # Always refill the pool; if the new context isn't complete, keep serving from the old one
+                if swapped:
+                    retired, self.context = self.context, new_context
+                    self.captures_since_recycle = 0
+                else:
+                    retired = new_context
+                for page in (fresh if swapped else drained):
+                    self.page_pool.put_nowait(page)
+                self.pages_open.set()
+
+            if retired:
+                try:
+                    await retired.close()
+                except Exception:
+                    pass
+            if swapped:
+                print("Browser context recycled")
+
+    async def _new_page(self, context=None) -> Page:
+        """Open a page configured for captures"""
+        page = await (context or self.context).new_page()
+        page.set_default_timeout(20000)
+        return page
+
+    async def _release_page(self, page: Optional[Page]):
+        """Reset a page and return it to the pool, replacing it if it can't be reused"""
+        replacement = None
+        try:
+            if page is not None:
+                try:
+                    await page.goto('about:blank')
+                    replacement = page
+                except Exception:
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass
+            if replacement is None:
+                replacement = await self._new_page()
+        except Exception as e:
+            print(f"Could not replace browser page: {e}")
+        finally:
+            # Always give the slot back; a None placeholder gets a fresh page on its next use
+            self.page_pool.put_nowait(replacement)
+
     async def capture_tweets(self, urls: List[str], options: ScreenshotOptions) -> List[ScreenshotResult]:
         """Capture screenshots for multiple tweet URLs or embed HTML"""
-        results = []
-        semaphore = asyncio.Semaphore(self.max_concurrent_pages)
+        if not self.context:
+            raise ScreenshotError("Screenshot service is not initialized")
 
-        async def capture_single_tweet(url_or_html: str) -> ScreenshotResult:
-            async with semaphore:
-                return await self._capture_tweet_screenshot(url_or_html, options)
+        results = []
 
         start_time = time.time()
-        tasks = [capture_single_tweet(url) for url in urls]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Start every embed HTML fetch now so network waits overlap instead of queueing behind the page pool
+        oembeds = self._start_oembed_fetches(urls)
+        try:
+            tasks = [self._capture_tweet_screenshot(url, options, oembeds.get(url)) for url in urls]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for oembed in oembeds.values():
+                oembed.cancel()
         processing_time = time.time() - start_time
 
+        self.captures_since_recycle += len(urls)
+        if self.captures_since_recycle >= self.context_recycle_interval:
+            self._schedule_recycle()
+
         final_results = []
         for i, result in enumerate(results):
             if isinstance(result, Exception):
@@ -132,29 +424,46 @@ class ScreenshotService:
         print(f"Batch completed: {len(urls)} URLs, {len([r for r in final_results if r.success])} successful, {processing_time:.2f}s")
         return final_results
 
-    async def _capture_tweet_screenshot(self, url_or_html: str, options: ScreenshotOptions) -> ScreenshotResult:
+    def _start_oembed_fetches(self, urls: List[str]) -> Dict[str, asyncio.Task]:
+        """Start one oEmbed fetch per distinct tweet URL, so each capture can begin as soon as its own lookup resolves"""
+        semaphore = asyncio.Semaphore(self.max_concurrent_oembeds)
+
+        async def fetch(url: str) -> Optional[str]:
+            async with semaphore:
+                return await self._fetch_oembed_html(extract_tweet_id(url))
+
+        return {
+            url: asyncio.create_task(fetch(url))
+            for url in dict.fromkeys(urls) if not self._is_embed_html(url)
+        }
+
+    async def _capture_tweet_screenshot(self, url_or_html: str, options: ScreenshotOptions, oembed: Optional[asyncio.Task] = None) -> ScreenshotResult:
         """Capture screenshot from tweet URL or embed HTML"""
-        page = None
+        # Wait for the embed HTML before taking a page, so pages aren't held idle on the network
+        oembed_html = None
+        if oembed is not None:
+            try:
+                oembed_html = await asyncio.shield(oembed)
+            except Exception:
+                pass
+
+        # Queue for a page without a deadline; the timeout covers the capture itself
+        await self.pages_open.wait()
+        page = await self.page_pool.get()
         try:
-            page = await self.context.new_page()
-            page.set_default_timeout(20000)
+            if page is None:
+                page = await self._new_page()
 
-            # Determine if input is HTML embed code or URL
-            if self._is_embed_html(url_or_html):
-                print("Processing Twitter embed HTML...")
-                return await self._capture_from_embed_html(page, url_or_html, options)
-            else:
-                print(f"Processing tweet URL: {url_or_html}")
-                # Try embed API first, then fall back to direct scraping
-                embed_result = await self._try_embed_api_approach(page, url_or_html, options)
-                if embed_result.success:
-                    return embed_result
-                else:
-                    print("Embed API failed, trying direct approach...")
-                    return await self._capture_direct_tweet(page, url_or_html, options)
+            return await asyncio.wait_for(
+                self._capture_on_page(page, url_or_html, options, oembed_html),
+                timeout=settings.SCREENSHOT_TIMEOUT
+            )
 
         except Exception as e:
-            error_msg = str(e)
+            if isinstance(e, asyncio.TimeoutError):
+                error_msg = f"Capture timed out after {settings.SCREENSHOT_TIMEOUT}s"
+            else:
+                error_msg = str(e)
             print(f"❌ Screenshot failed: {error_msg}")
             return ScreenshotResult(
                 url=url_or_html,
@@ -163,57 +472,50 @@ class ScreenshotService:
             )
 
         finally:
-            if page:
-                await page.close()
+            await self._release_page(page)
+
+    async def _capture_on_page(self, page: Page, url_or_html: str, options: ScreenshotOptions, oembed_html: Optional[str]) -> ScreenshotResult:
+        """Capture a tweet URL or embed HTML on a page taken from the pool"""
+        # Determine if input is HTML embed code or URL
+        if self._is_embed_html(url_or_html):
+            print("Processing Twitter embed HTML...")
+            return await self._capture_from_embed_html(page, url_or_html, options)
+
+        print(f"Processing tweet URL: {url_or_html}")
+        # Try embed API first, then fall back to direct scraping
+        embed_result = await self._try_embed_api_approach(page, url_or_html, options, oembed_html)
+        if embed_result.success:
+            return embed_result
+
+        print("Embed API failed, trying direct approach...")
+        return await self._capture_direct_tweet(page, url_or_html, options)
 
     def _is_embed_html(self, content: str) -> bool:
         """Check if content is Twitter embed HTML"""
-        embed_indicators = [
-            'class="twitter-tweet"',
-            'blockquote class="twitter-tweet"',
-            'platform.twitter.com/widgets.js',
-            'twitter.com/embed',
-            'data-tweet-id'
-        ]
-        return any(indicator in content for indicator in embed_indicators)
+        return is_embed_html(content)
 
-    async def _try_embed_api_approach(self, page: Page, tweet_url: str, options: ScreenshotOptions) -> ScreenshotResult:
+    async def _try_embed_api_approach(self, page: Page, tweet_url: str, options: ScreenshotOptions, oembed_html: Optional[str]) -> ScreenshotResult:
         """Try using Twitter's official embed API"""
         try:
             tweet_id = extract_tweet_id(tweet_url)
             if not tweet_id:
-                raise Exception("Could not extract tweet ID from URL")
+                raise ScreenshotError("Could not extract tweet ID from URL")
 
             print(f"Trying embed API for tweet ID: {tweet_id}")
 
-            # Method 1: Use Twitter's oEmbed API
-            oembed_url = f"https://publish.twitter.com/oembed?url=https://twitter.com/i/status/{tweet_id}"
-
-            try:
-                # Get embed HTML from Twitter's API
-                embed_response = await page.evaluate(f"""
-                async () => {{
-                    try {{
-                        const response = await fetch('{oembed_url}');
-                        const data = await response.json();
-                        return data.html;
-                    }} catch (e) {{
-                        return null;
-                    }}
-                }}
-                """)
-
-                if embed_response:
+            # Method 1: Use the embed HTML prefetched from Twitter's oEmbed API
+            if oembed_html:
+                try:
                     print("✅ Got embed HTML from Twitter API")
-                    return await self._capture_from_embed_html(page, embed_response, options)
+                    return await self._capture_from_embed_html(page, oembed_html, options)
 
-            except Exception as e:
-                print(f"oEmbed API failed: {e}")
+                except Exception as e:
+                    print(f"oEmbed API failed: {e}")
 
             # Method 2: Create embed manually using Twitter's widget
             print("Trying manual embed creation...")
             embed_html = self._create_embed_html(tweet_id, tweet_url)
-            return await self._capture_from_embed_html(page, embed_html, options)
+            return await self._capture_from_embed_html(page, embed_html, options, manual_embed=True)
 
         except Exception as e:
             print(f"Embed API approach failed: {e}")
@@ -223,10 +525,29 @@ class ScreenshotService:
                 error=str(e)
             )
 
+    async def _fetch_oembed_html(self, tweet_id: str) -> Optional[str]:
+        """Get embed HTML from Twitter's oEmbed API, using the cache when possible"""
+        cached = self.oembed_cache.get(tweet_id)
+        if cached is not None:
+            return cached
+
+        oembed_url = f"https://publish.twitter.com/oembed?url=https://twitter.com/i/status/{tweet_id}"
+        try:
+            response = await self.http.get(oembed_url)
+            response.raise_for_status()
+            embed_html = response.json().get('html')
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"oEmbed request failed: {e}")
+            return None
+
+        if embed_html:
+            self.oembed_cache[tweet_id] = embed_html
+        return embed_html
+
     def _create_embed_html(self, tweet_id: str, tweet_url: str) -> str:
         """Create Twitter embed HTML manually"""
         # Extract username from URL if possible
-        username_match = re.search(r'twitter\.com/([^/]+)/', tweet_url) or re.search(r'x\.com/([^/]+)/', tweet_url)
+        username_match = USERNAME_RE.search(tweet_url)
         username = username_match.group(1) if username_match else 'user'
 
         embed_html = f"""
@@ -242,10 +563,6 @@ class ScreenshotService:
                     margin: 20px;
                     background: white;
                 }}
-                .twitter-tweet {{
-                    max-width: {options.width}px !important;
-                    margin: 0 auto !important;
-                }}
             </style>
         </head>
         <body>
@@ -272,56 +589,34 @@ class ScreenshotService:
         """
         return embed_html
 
-    async def _capture_from_embed_html(self, page: Page, embed_html: str, options: ScreenshotOptions) -> ScreenshotResult:
+    async def _capture_from_embed_html(self, page: Page, embed_html: str, options: ScreenshotOptions, manual_embed: bool = False) -> ScreenshotResult:
         """Capture screenshot from Twitter embed HTML"""
         try:
             print("Loading embed HTML...")
 
-            # Load the embed HTML
-            await page.set_content(embed_html)
-
-            # Wait for Twitter widget to load
-            print("Waiting for Twitter widget to load...")
-            await page.wait_for_load_state('networkidle')
-
-            # Wait for the tweet to fully render
-            tweet_loaded = False
-            max_attempts = 20
-
-            for attempt in range(max_attempts):
-                try:
-                    # Check if the tweet iframe has loaded
-                    iframe = await page.wait_for_selector('iframe[src*="platform.twitter.com"]', timeout=1000)
-                    if iframe:
-                        print("✅ Twitter widget iframe loaded")
-                        tweet_loaded = True
-                        break
-                except:
-                    pass
-
-                # Also check for direct tweet content
-                try:
-                    tweet_content = await page.wait_for_selector('.twitter-tweet p', timeout=1000)
-                    if tweet_content:
-                        text_content = await tweet_content.text_content()
-                        if text_content and not text_content.startswith('Loading'):
-                            print("✅ Tweet content loaded")
-                            tweet_loaded = True
-                            break
-                except:
-                    pass
+            # Inline the embed customizations so they apply with the initial parse
+            style_tag = f"<style>{self._embed_customizations_css(options)}</style>"
+            if '</head>' in embed_html:
+                styled_html = embed_html.replace('</head>', f"{style_tag}</head>", 1)
+            else:
+                styled_html = style_tag + embed_html
 
-                print(f"Waiting for tweet to load... ({attempt + 1}/{max_attempts})")
-                await asyncio.sleep(0.5)
+            # Load the embed HTML; readiness is detected below rather than via load events
+            await page.set_content(styled_html, wait_until='domcontentloaded', timeout=10000)
 
-            if not tweet_loaded:
+            print("Waiting for Twitter widget to load...")
+            # Wait for widgets.js to replace the blockquote with the tweet iframe
+            try:
+                await page.wait_for_function(TWEET_READY_JS, arg=manual_embed, timeout=10000)
+                print("✅ Tweet loaded")
+            except Exception:
                 print("⚠️ Tweet may not have loaded completely, proceeding anyway...")
 
-            # Additional wait for rendering
-            await asyncio.sleep(3)
-
-            # Apply embed-specific customizations
-            await self._apply_embed_customizations(page, options)
+            # Give images inside the widget a moment to settle
+            try:
+                await page.wait_for_load_state('networkidle', timeout=3000)
+            except Exception:
+                pass
 
             # Find the best element to screenshot
             screenshot_target = None
@@ -332,23 +627,18 @@ class ScreenshotService:
                 'body'
             ]
 
-            for selector in selectors_to_try:
-                try:
-                    element = await page.wait_for_selector(selector, timeout=2000)
-                    if element:
-                        screenshot_target = element
-                        print(f"Found screenshot target: {selector}")
-                        break
-                except:
-                    continue
+            selector = await self._find_first_selector(page, selectors_to_try, timeout=2000)
+            if selector:
+                screenshot_target = await page.query_selector(selector)
+                print(f"Found screenshot target: {selector}")
 
             if not screenshot_target:
-                raise Exception("Could not find any element to screenshot")
+                raise ScreenshotError("Could not find any element to screenshot")
 
             # Take screenshot
             print("Taking embed screenshot...")
             screenshot_options = {
-                'type': options.format,
+                'type': _screenshot_type(options.format),
                 'quality': 90 if options.format == 'jpg' else None,
                 'omit_background': options.background == 'transparent',
                 'animations': 'disabled'
@@ -357,7 +647,7 @@ class ScreenshotService:
             # For iframes, we need to take a full page screenshot and crop
             if 'iframe' in str(screenshot_target):
                 screenshot_bytes = await page.screenshot(
-                    type=options.format,
+                    type=_screenshot_type(options.format),
                     quality=90 if options.format == 'jpg' else None,
                     full_page=True
                 )
@@ -365,65 +655,97 @@ class ScreenshotService:
                 screenshot_bytes = await screenshot_target.screenshot(**screenshot_options)
 
             if not screenshot_bytes:
-                raise Exception("Screenshot capture returned empty data")
-
-            # Process image
-            processed_image = await self._process_image_full(
-                screenshot_bytes, 
-                options.width, 
-                options.border_radius,
-                options.background
-            )
+                raise ScreenshotError("Screenshot capture returned empty data")
+
+            # Process and encode image
+            image, file_size, image_width, image_height = await self._process_image(screenshot_bytes, options)
 
             # Generate filename
             tweet_id = self._extract_tweet_id_from_html(embed_html)
             filename = generate_filename(tweet_id or 'embed', options.format, options.include_metadata)
 
-            # Encode to base64
-            buffered = io.BytesIO()
-            processed_image.save(buffered, 
-                               format=options.format.upper() if options.format != 'jpg' else 'JPEG',
-                               quality=90 if options.format == 'jpg' else None,
-                               optimize=True)
-            img_base64 = base64.b64encode(buffered.getvalue()).decode()
+            img_base64, image_url = await self._encode_image(image, options)
 
-            print(f"✅ EMBED screenshot successful: {filename} ({processed_image.width}x{processed_image.height}px)")
+            print(f"✅ EMBED screenshot successful: {filename} ({image_width}x{image_height}px)")
 
             return ScreenshotResult(
                 url=embed_html[:100] + "..." if len(embed_html) > 100 else embed_html,
                 image_base64=img_base64,
+                image_url=image_url,
                 filename=filename,
                 success=True,
-                file_size=len(buffered.getvalue()),
-                dimensions={"width": processed_image.width, "height": processed_image.height}
+                file_size=file_size,
+                dimensions={"width": image_width, "height": image_height}
             )
 
         except Exception as e:
             print(f"Embed capture failed: {e}")
             raise e
 
+    async def _process_image(self, screenshot_bytes: bytes, options: ScreenshotOptions) -> Tuple[Union[bytes, str], int, int, int]:
+        """Post-process a screenshot in the image process pool, returning (image, file_size, width, height)"""
+        inline = options.return_mode == 'inline'
+
+        # Keep the browser's encoding when nothing needs to change, skipping PIL and the pool round trip
+        size = _unchanged_size(screenshot_bytes, options.width, options.border_radius, options.background, options.format)
+        if size:
+            image = base64.b64encode(screenshot_bytes).decode('ascii') if inline else screenshot_bytes
+            return image, len(screenshot_bytes), size[0], size[1]
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.image_pool,
+            _process_image_sync,
+            screenshot_bytes,
+            options.width,
+            options.border_radius,
+            options.background,
+            options.format,
+            inline
+        )
+
+    async def _find_first_selector(self, page: Page, selectors: List[str], timeout: int) -> Optional[str]:
+        """Wait for any of the selectors to match and return the highest-priority one present"""
+        try:
+            handle = await page.wait_for_function(FIRST_SELECTOR_JS, arg=selectors, timeout=timeout)
+            return await handle.json_value()
+        except Exception:
+            return None
+
+    async def _encode_image(self, image: Union[bytes, str], options: ScreenshotOptions) -> Tuple[Optional[str], Optional[str]]:
+        """Return (image_base64, image_url) for the requested return mode"""
+        if options.return_mode == 'inline':
+            # Already base64-encoded by the image pool
+            return image, None
+
+        image_data = image
+
+        # Store the image under a content hash so identical captures share a file
+        stored_name = f"{hashlib.blake2b(image_data, digest_size=16).hexdigest()}.{options.format}"
+        stored_path = os.path.join(settings.TEMP_DIR, stored_name)
+        try:
+            # Reset the file's age so the sweep keeps it as long as the cached result pointing at it
+            os.utime(stored_path)
+        except FileNotFoundError:
+            async with aiofiles.open(stored_path, 'wb') as f:
+                await f.write(image_data)
+
+        return None, f"/screenshots/{stored_name}"
+
     def _extract_tweet_id_from_html(self, html: str) -> Optional[str]:
         """Extract tweet ID from embed HTML"""
         # Try various patterns to find tweet ID
-        patterns = [
-            r'data-tweet-id="([^"]+)"',
-            r'/status/(\d+)',
-            r'twitter\.com/[^/]+/status/(\d+)',
-            r'x\.com/[^/]+/status/(\d+)'
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, html)
+        for pattern in TWEET_ID_HTML_RES:
+            match = pattern.search(html)
             if match:
                 return match.group(1)
 
         return None
 
-    async def _apply_embed_customizations(self, page: Page, options: ScreenshotOptions):
-        """Apply customizations specific to embed screenshots"""
+    def _embed_customizations_css(self, options: ScreenshotOptions) -> str:
+        """Build the CSS customizations specific to embed screenshots"""
 
-        css_customizations = f"""
-        <style>
+        return f"""
         /* Apply theme */
         {'html, body { filter: invert(1) hue-rotate(180deg); }' if options.theme == 'dark' else ''}
         {('iframe, img { filter: invert(1) hue-rotate(180deg) !important; }' if options.theme == 'dark' else '')}
@@ -455,11 +777,8 @@ class ScreenshotService:
         .twitter-mention-button {{
             display: none !important;
         }}
-        </style>
         """
 
-        await page.add_style_tag(content=css_customizations)
-
     async def _capture_direct_tweet(self, page: Page, url: str, options: ScreenshotOptions) -> ScreenshotResult:
         """Fallback: Capture tweet using direct scraping (existing method)"""
         try:
@@ -470,13 +789,12 @@ class ScreenshotService:
             response = await page.goto(normalized_url, wait_until='domcontentloaded', timeout=20000)
 
             if response and response.status >= 400:
-                raise Exception(f"HTTP {response.status}: Failed to load tweet")
+                raise ScreenshotError(f"HTTP {response.status}: Failed to load tweet")
 
             await asyncio.sleep(2)
 
             # Check for restrictions and bypass if needed
-            age_restricted = await self._check_age_restriction(page)
-            login_required = await self._check_login_required(page)
+            age_restricted, login_required = await self._check_restrictions(page)
 
             if age_restricted:
                 await self._bypass_age_restriction(page)
@@ -491,17 +809,13 @@ class ScreenshotService:
             ]
 
             tweet_element = None
-            for selector in tweet_selectors:
-                try:
-                    await page.wait_for_selector(selector, timeout=8000)
-                    tweet_element = page.locator(selector).first
-                    print(f"✅ Found tweet element: {selector}")
-                    break
-                except Exception:
-                    continue
+            selector = await self._find_first_selector(page, tweet_selectors, timeout=8000)
+            if selector:
+                tweet_element = page.locator(selector).first
+                print(f"✅ Found tweet element: {selector}")
 
             if not tweet_element:
-                raise Exception("Could not find tweet element")
+                raise ScreenshotError("Could not find tweet element")
 
             await self._apply_direct_customizations(page, options)
 
@@ -513,42 +827,33 @@ class ScreenshotService:
             await asyncio.sleep(2)
 
             screenshot_bytes = await tweet_element.screenshot(
-                type=options.format,
+                type=_screenshot_type(options.format),
                 quality=90 if options.format == 'jpg' else None,
                 omit_background=options.background == 'transparent',
                 animations='disabled'
             )
 
-            processed_image = await self._process_image_full(
-                screenshot_bytes, 
-                options.width, 
-                options.border_radius,
-                options.background
-            )
+            image, file_size, image_width, image_height = await self._process_image(screenshot_bytes, options)
 
             tweet_id = extract_tweet_id(url)
             filename = generate_filename(tweet_id, options.format, options.include_metadata)
 
-            buffered = io.BytesIO()
-            processed_image.save(buffered, 
-                               format=options.format.upper() if options.format != 'jpg' else 'JPEG',
-                               quality=90 if options.format == 'jpg' else None,
-                               optimize=True)
-            img_base64 = base64.b64encode(buffered.getvalue()).decode()
+            img_base64, image_url = await self._encode_image(image, options)
 
             print(f"✅ DIRECT screenshot successful: {filename}")
 
             return ScreenshotResult(
                 url=url,
                 image_base64=img_base64,
+                image_url=image_url,
                 filename=filename,
                 success=True,
-                file_size=len(buffered.getvalue()),
-                dimensions={"width": processed_image.width, "height": processed_image.height}
+                file_size=file_size,
+                dimensions={"width": image_width, "height": image_height}
             )
 
         except Exception as e:
-            raise Exception(f"Direct capture failed: {e}")
+            raise ScreenshotError(f"Direct capture failed: {e}")
 
     # [Include all the existing bypass methods here...]
     def _normalize_tweet_url(self, url: str) -> str:
@@ -556,37 +861,13 @@ class ScreenshotService:
             return url.replace('twitter.com', 'x.com')
         return url
 
-    async def _check_age_restriction(self, page: Page) -> bool:
-        age_indicators = [
-            'button:has-text("Yes, view profile")',
-            'text="This account may include potentially sensitive content"',
-            '[data-testid="confirmationSheetConfirm"]'
-        ]
-
-        for indicator in age_indicators:
-            try:
-                element = await page.wait_for_selector(indicator, timeout=2000)
-                if element:
-                    return True
-            except:
-                continue
-        return False
-
-    async def _check_login_required(self, page: Page) -> bool:
-        login_indicators = [
-            'a[href="/login"]',
-            'text="Log in"',
-            'button:has-text("Log in")'
-        ]
-
-        for indicator in login_indicators:
-            try:
-                element = await page.wait_for_selector(indicator, timeout=2000)
-                if element:
-                    return True
-            except:
-                continue
-        return False
+    async def _check_restrictions(self, page: Page) -> Tuple[bool, bool]:
+        """Return (age_restricted, login_required) from a single page evaluation"""
+        try:
+            restrictions = await page.evaluate(RESTRICTIONS_JS)
+            return restrictions['age'], restrictions['login']
+        except Exception:
+            return False, False
 
     async def _bypass_age_restriction(self, page: Page):
         bypass_buttons = [
@@ -602,7 +883,7 @@ class ScreenshotService:
                     await button.click()
                     await asyncio.sleep(2)
                     return
-            except:
+            except Exception:
                 continue
 
     async def _bypass_login_requirement(self, page: Page, url: str):
@@ -612,7 +893,7 @@ class ScreenshotService:
         try:
             await page.goto(alt_url, wait_until='domcontentloaded', timeout=10000)
             await asyncio.sleep(2)
-        except:
+        except Exception:
             pass
 
     async def _quick_video_check(self, page: Page) -> int:
@@ -623,7 +904,7 @@ class ScreenshotService:
                 return videos.length;
             }
             """)
-        except:
+        except Exception:
             return 0
 
     async def _process_videos_minimal(self, page: Page):
@@ -646,7 +927,7 @@ class ScreenshotService:
                 }
                 </style>
             """)
-        except:
+        except Exception:
             pass
 
     async def _apply_direct_customizations(self, page: Page, options: ScreenshotOptions):
@@ -673,40 +954,3 @@ class ScreenshotService:
         """
 
         await page.add_style_tag(content=css)
-
-    async def _process_image_full(self, image_bytes: bytes, width: int, border_radius: int, background: str) -> Image.Image:
-        try:
-            image = Image.open(io.BytesIO(image_bytes))
-
-            if image.width != width:
-                aspect_ratio = image.height / image.width
-                new_height = int(width * aspect_ratio)
-                image = image.resize((width, new_height), Image.Resampling.LANCZOS)
-
-            if background != 'transparent' and image.mode == 'RGBA':
-                bg_image = Image.new('RGB', image.size, background)
-                bg_image.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-                image = bg_image
-
-            if border_radius > 0 and border_radius < min(image.width, image.height) // 2:
-                image = self._apply_border_radius(image, border_radius)
-
-            return image
-        except:
-            return Image.open(io.BytesIO(image_bytes))
-
-    def _apply_border_radius(self, image: Image.Image, radius: int) -> Image.Image:
-        try:
-            mask = Image.new('L', image.size, 0)
-            draw = ImageDraw.Draw(mask)
-            draw.rounded_rectangle([(0, 0), image.size], radius=radius, fill=255)
-
-            if image.mode != 'RGBA':
-                image = image.convert('RGBA')
-
-            output = Image.new('RGBA', image.size, (0, 0, 0, 0))
-            output.paste(image, (0, 0))
-            output.putalpha(mask)
-            return output
-        except:
-            return image
@@ -2,28 +2,50 @@
 Utility functions
 """
 
+import os
 import re
+import time
 import hashlib
+from functools import lru_cache
 from datetime import datetime
 from typing import List, Optional
 from urllib.parse import urlparse
 
+TWEET_URL_RE = re.compile(r'https?://(www\.)?(twitter\.com|x\.com)/\w+/status/\d+')
+_TWEET_ID_RE = re.compile(r'/status/(\d+)')
+_UNSAFE_FILENAME_RE = re.compile(r'[^\w\-_\.]')
+# URLs, mentions and hashtags, removed in a single pass
+_TWEET_NOISE_RE = re.compile(r'https?://\S+|@\w+|#\w+')
+
+# Any one of these markers means the input is embed HTML; matched in a single scan
+_EMBED_HTML_RE = re.compile(
+    r'class="twitter-tweet"'
+    r'|blockquote class="twitter-tweet"'
+    r'|platform\.twitter\.com/widgets\.js'
+    r'|twitter\.com/embed'
+    r'|data-tweet-id'
+)
+
 def validate_urls(urls: List[str]) -> List[str]:
     """Validate and filter tweet URLs"""
     valid_urls = []
-    tweet_pattern = r'https?://(www\.)?(twitter\.com|x\.com)/\w+/status/\d+'
     
     for url in urls:
         url = url.strip()
-        if re.match(tweet_pattern, url):
+        if TWEET_URL_RE.match(url):
             valid_urls.append(url)
     
     return valid_urls
 
+def is_embed_html(content: str) -> bool:
+    """Check if content is Twitter embed HTML"""
+    return _EMBED_HTML_RE.search(content) is not None
+
+@lru_cache(maxsize=4096)
 def extract_tweet_id(url: str) -> str:
     """Extract tweet ID from URL"""
-    match = re.search(r'/status/(\d+)', url)
-    return match.group(1) if match else hashlib.md5(url.encode()).hexdigest()[:8]
+    match = _TWEET_ID_RE.search(url)
+    return match.group(1) if match else hashlib.blake2b(url.encode(), digest_size=4).hexdigest()
 
 def generate_filename(tweet_id: str, format: str, include_metadata: bool = False) -> str:
     """Generate filename for screenshot"""
@@ -36,12 +58,26 @@ def generate_filename(tweet_id: str, format: str, include_metadata: bool = False
 
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for safe storage"""
-    return re.sub(r'[^\w\-_\.]', '_', filename)
+    return _UNSAFE_FILENAME_RE.sub('_', filename)
 
 def clean_tweet_content(content: str) -> str:
     """Clean tweet content for filename generation"""
     # Remove URLs, mentions, hashtags for cleaner filenames
-    cleaned = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', content)
-    cleaned = re.sub(r'@\w+', '', cleaned)
-    cleaned = re.sub(r'#\w+', '', cleaned)
-    return cleaned.strip()[:50]  # Limit length
+    return _TWEET_NOISE_RE.sub('', content).strip()[:50]  # Limit length
+
+def remove_stale_files(directory: str, max_age: float) -> int:
+    """Delete files in directory not modified for max_age seconds, returning how many were removed"""
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except OSError:
+                    pass
+    except FileNotFoundError:
+        pass
+    return removed
\ No newline at end of file
@@ -163,16 +163,19 @@ class TwitterScreenshotApp {
         div.className = `result-item ${result.success ? 'success' : 'error'}`;
 
         if (result.success) {
+            const extension = result.filename.split('.').pop();
+            const mimeType = extension === 'jpg' ? 'jpeg' : extension;
+            const imageSrc = result.image_url || `data:image/${mimeType};base64,${result.image_base64}`;
             div.innerHTML = `
                 <div class="result-header">
                     <span class="result-status success">✅ Success</span>
                 </div>
                 <div class="result-image">
-                    <img src="data:image/${result.filename.includes('.png') ? 'png' : 'jpeg'};base64,${result.image_base64}" 
+                    <img src="${imageSrc}" 
                          alt="Screenshot" style="max-width: 100%; border-radius: 8px;">
                 </div>
                 <div class="result-actions">
-                    <a href="data:image/${result.filename.includes('.png') ? 'png' : 'jpeg'};base64,${result.image_base64}" 
+                    <a href="${imageSrc}" 
                        download="${result.filename}" 
                        class="action-btn">💾 Download</a>
                 </div>